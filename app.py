@@ -1,6 +1,11 @@
+import threading
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 from dbconnector import get_engine
@@ -61,32 +66,268 @@ custom_css = """
     header {visibility: hidden;}
 </style>
 """
-st.markdown(custom_css, unsafe_allow_html=True)
 
 # Initialize engine globally
 engine = get_engine()
 
+# Rows per ledger page (served by retail_sales_date_filter_idx, see migrations/)
+LEDGER_PAGE_SIZE = 500
+
+# The ledger's first page only looks this far back from the latest matching sale
+LEDGER_RECENT_DAYS = 30
+
+# Queries dispatched in parallel per rerun; keep at or below the engine's pool_size (see dbconnector.py)
+QUERY_WORKERS = 4
+
+# DATE columns run_query converts back from text after the Arrow-backed read
+DATE_COLUMNS = {"sale_date", "rollup_through", "latest_sale"}
+
 # ---------------- CACHING & DATA FETCHING ----------------
-@st.cache_data(show_spinner=False, ttl=600)
+def _params_cache_key(params: dict) -> tuple:
+    # Order-independent cache key so equivalent filter selections share one cache entry
+    return tuple(sorted(
+        (k, tuple(sorted(v, key=str)) if isinstance(v, (list, tuple, set, frozenset)) else v)
+        for k, v in params.items()
+    ))
+
+@st.cache_data(show_spinner=False, ttl=600, hash_funcs={dict: _params_cache_key})
 def run_query(query: str, params: dict = None) -> pd.DataFrame:
-    try:
-        with engine.connect() as conn:
-            return pd.read_sql(text(query), conn, params=params)
-    except SQLAlchemyError as e:
-        st.error(f"Database connection error: {e}")
-        st.stop()
+    # SQLAlchemyError is left to propagate: st.cache_data doesn't cache exceptions, and st.stop() is a no-op
+    # on worker threads, so callers report failures from the script thread (see main)
+    with engine.connect() as conn:
+        # Arrow-backed columns avoid NumPy object arrays for the string-heavy category/gender data
+        df = pd.read_sql_query(text(query), conn, params=params, dtype_backend="pyarrow")
+    # The Arrow backend hands DATE columns back as ISO strings; restore them to date32 (datetime.date scalars)
+    for col in DATE_COLUMNS.intersection(df.columns):
+        df[col] = df[col].astype("date32[pyarrow]")
+    return df
+
+def run_concurrently(tasks: dict) -> dict:
+    # Run {key: (fn, *args)} on a thread pool; psycopg2 releases the GIL on I/O, so round trips overlap.
+    # Workers inherit the script context so st.cache_data works inside them; exceptions (e.g. SQLAlchemyError)
+    # are re-raised here by future.result(), since st.stop() only takes effect on the script thread.
+    ctx = get_script_run_ctx()
+
+    def _call(fn, *args):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args)
+
+    with ThreadPoolExecutor(max_workers=QUERY_WORKERS) as executor:
+        futures = {key: executor.submit(_call, *task) for key, task in tasks.items()}
+        return {key: future.result() for key, future in futures.items()}
+
+@st.cache_data(show_spinner=False, ttl=86400)
+def load_filter_metadata():
+    # Date bounds and distinct filter values in a single round-trip, tagged by kind.
+    # These rarely change, so they get a 24h TTL independent of the dashboard queries.
+    metadata_query = """
+    SELECT 'bounds' AS k, MIN(sale_date)::text AS v1, MAX(sale_date)::text AS v2 FROM retail_sales
+    UNION ALL
+    SELECT 'gender', gender, NULL FROM (SELECT DISTINCT gender FROM retail_sales) g
+    UNION ALL
+    SELECT 'category', category, NULL FROM (SELECT DISTINCT category FROM retail_sales) c
+    """
+    df_meta = run_query(metadata_query)
+
+    bounds = df_meta[df_meta['k'] == 'bounds'].iloc[0]
+    # The bounds come back as ISO 'YYYY-MM-DD' text from the ::text cast, so no pandas datetime parsing is needed
+    min_date = date.fromisoformat(bounds['v1'])
+    max_date = date.fromisoformat(bounds['v2'])
+    gender_list = df_meta.loc[df_meta['k'] == 'gender', 'v1'].tolist()
+    category_list = df_meta.loc[df_meta['k'] == 'category', 'v1'].tolist()
+    return min_date, max_date, gender_list, category_list
+
+def get_trend_bucket(start_date, end_date, max_points: int = 2000) -> str:
+    # Coarsen the trend grain for long ranges so the browser never receives more than ~max_points samples
+    span_days = (end_date - start_date).days + 1
+    if span_days <= max_points:
+        return "day"
+    if span_days // 7 <= max_points:
+        return "week"
+    return "month"
+
+def get_distinct_customers_expr(start_date, end_date, exact_max_days: int = 30) -> str:
+    # Short ranges keep the exact count; longer ones use a HyperLogLog sketch (~1% error, O(1) memory per group)
+    if (end_date - start_date).days < exact_max_days:
+        return "COUNT(DISTINCT customer_id)"
+    # COALESCE: older postgresql-hll releases return NULL from hll_add_agg over zero rows
+    return "COALESCE(ROUND(hll_cardinality(hll_add_agg(hll_hash_integer(customer_id)))), 0)"
+
+BASE_WHERE_CLAUSE = "WHERE sale_date BETWEEN :start_date AND :end_date AND gender IN :gender AND category IN :category"
+
+def filters_to_params(filters: tuple) -> dict:
+    start_date, end_date, gender, category = filters
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "gender": gender,
+        "category": category
+    }
+
+def load_aggregates(filters: tuple) -> dict:
+    # Every chart rollup (trend, donut, heatmap, demographics) plus revenue/order KPIs in one GROUPING SETS
+    # pass over the retail_sales_daily materialized view (see migrations/), which is pre-grouped by
+    # (sale_date, category, gender) and so far smaller than the raw table. The view is refreshed nightly,
+    # so these figures can trail the live table (and the ledger) by up to 24h; rollup_through reports how far
+    # they reach.
+    # GROUPING() bitmask: sale_date=8, category=4, gender=2, dow=1 (a set bit means the column is rolled up)
+    trend_bucket = get_trend_bucket(filters[0], filters[1])
+    trend_expr = "sale_date" if trend_bucket == "day" else f"DATE_TRUNC('{trend_bucket}', sale_date)::date"
+    agg_query = f"""
+    SELECT {trend_expr} AS sale_date, category, gender,
+           EXTRACT(ISODOW FROM sale_date) AS dow,
+           SUM(daily_sales) AS total_sales,
+           COALESCE(SUM(n_orders), 0) AS total_orders,
+           GROUPING({trend_expr}, category, gender, EXTRACT(ISODOW FROM sale_date)) AS grp
+    FROM retail_sales_daily {BASE_WHERE_CLAUSE}
+    GROUP BY GROUPING SETS (
+        (),
+        ({trend_expr}),
+        (category),
+        (EXTRACT(ISODOW FROM sale_date), category),
+        (category, gender)
+    )
+    """
+    # Distinct customers can't be summed across daily buckets, so that KPI still reads the raw table,
+    # clamped to the dates the view covers so all four KPI cards describe the same period
+    customers_query = f"""
+    SELECT {get_distinct_customers_expr(filters[0], filters[1])} AS total_customers,
+           (SELECT MAX(sale_date) FROM retail_sales_daily) AS rollup_through,
+           (SELECT MAX(sale_date) FROM retail_sales {BASE_WHERE_CLAUSE}) AS latest_sale
+    FROM retail_sales {BASE_WHERE_CLAUSE}
+      AND sale_date <= (SELECT MAX(sale_date) FROM retail_sales_daily)
+    """
+    params = filters_to_params(filters)
+    results = run_concurrently({
+        "agg": (run_query, agg_query, params),
+        "customers": (run_query, customers_query, params)
+    })
+    df_agg, df_customers = results["agg"], results["customers"]
+
+    kpi_row = df_agg[df_agg['grp'] == 15].iloc[0].copy()
+    kpi_row['total_customers'] = df_customers['total_customers'].iloc[0]
+    kpi_row['rollup_through'] = df_customers['rollup_through'].iloc[0]
+    kpi_row['latest_sale'] = df_customers['latest_sale'].iloc[0]
+
+    return {
+        "kpi": kpi_row,
+        "trend": df_agg.loc[df_agg['grp'] == 7, ['sale_date', 'total_sales']].sort_values('sale_date'),
+        "category": df_agg.loc[df_agg['grp'] == 11, ['category', 'total_sales']],
+        "heatmap": df_agg.loc[df_agg['grp'] == 10, ['dow', 'category', 'total_sales']],
+        "demographics": df_agg.loc[df_agg['grp'] == 9, ['category', 'gender', 'total_sales']]
+    }
+
+def load_ledger_page(filters: tuple, cursor) -> pd.DataFrame:
+    # Keyset pagination: the cursor is the (sale_date, transaction_id) of the last row on the previous page.
+    # The first page is a recent-activity preview bounded to LEDGER_RECENT_DAYS before the latest matching
+    # sale, so selective filters turn into a short index range scan instead of walking the whole date range.
+    ledger_params = filters_to_params(filters)
+    if cursor is None:
+        recent_cte = f"WITH recent AS (SELECT MAX(sale_date) AS m FROM retail_sales {BASE_WHERE_CLAUSE})"
+        page_clause = f"AND sale_date > (SELECT m FROM recent) - {LEDGER_RECENT_DAYS}"
+    else:
+        recent_cte = ""
+        page_clause = "AND (sale_date, transaction_id) < (:cursor_date, :cursor_id)"
+        ledger_params["cursor_date"], ledger_params["cursor_id"] = cursor
+
+    raw_query = f"""
+    {recent_cte}
+    SELECT sale_date, transaction_id, customer_id, gender, category, total_sale
+    FROM retail_sales {BASE_WHERE_CLAUSE} {page_clause}
+    ORDER BY sale_date DESC, transaction_id DESC
+    LIMIT {LEDGER_PAGE_SIZE}
+    """
+    return run_query(raw_query, ledger_params)
+
+# ---------------- CHART BUILDERS ----------------
+# Figures are cached on the aggregate DataFrames main() already loaded (st.cache_data hashes their contents),
+# so unchanged views skip Plotly figure construction on rerun without refetching
+PLOTLY_TEMPLATE = "plotly_dark"
+CHART_BG_COLOR = 'rgba(0,0,0,0)'
+CUSTOM_INDIGO_COLORS = ['#3730a3', '#4f46e5', '#6366f1', '#818cf8', '#a5b4fc', '#c7d2fe']
+DAYS_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+@st.cache_data(show_spinner=False, ttl=600)
+def build_trend_fig(trend_df: pd.DataFrame) -> go.Figure:
+    # Scattergl renders through WebGL, which stays responsive on multi-year daily series
+    fig_area = go.Figure([
+        go.Scattergl(
+            x=trend_df['sale_date'], y=trend_df['total_sales'],
+            mode='lines', fill='tozeroy', line_color='#818cf8'
+        )
+    ])
+    fig_area.update_layout(
+        template=PLOTLY_TEMPLATE,
+        plot_bgcolor=CHART_BG_COLOR, paper_bgcolor=CHART_BG_COLOR,
+        xaxis=dict(showgrid=False, title=""), 
+        yaxis=dict(showgrid=True, gridcolor='#334155', title="Revenue ($)"),
+        margin=dict(l=0, r=0, t=10, b=0)
+    )
+    return fig_area
+
+@st.cache_data(show_spinner=False, ttl=600)
+def build_category_fig(cat_df: pd.DataFrame) -> go.Figure:
+    fig_donut = px.pie(
+        cat_df, values="total_sales", names="category", hole=0.7,
+        template=PLOTLY_TEMPLATE, color_discrete_sequence=CUSTOM_INDIGO_COLORS
+    )
+    fig_donut.update_traces(textposition='inside', textinfo='percent')
+    fig_donut.update_layout(
+        plot_bgcolor=CHART_BG_COLOR, paper_bgcolor=CHART_BG_COLOR,
+        margin=dict(l=0, r=0, t=10, b=0), showlegend=True,
+        legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5)
+    )
+    return fig_donut
+
+@st.cache_data(show_spinner=False, ttl=600)
+def build_heatmap_fig(heatmap_df: pd.DataFrame) -> go.Figure:
+    # Pivot the already-aggregated rows into a dense 7 x n_categories matrix so Plotly skips its binning pass.
+    # Postgres ISODOW runs 1 (Monday) to 7 (Sunday), so reindexing on 1..7 puts the rows in display order.
+    heatmap_matrix = (
+        heatmap_df.assign(dow=heatmap_df['dow'].astype('int8'))
+        .pivot(index='dow', columns='category', values='total_sales')
+        .reindex(range(1, len(DAYS_ORDER) + 1))
+    )
+    fig_heat = go.Figure(go.Heatmap(
+        z=heatmap_matrix.to_numpy(dtype=float, na_value=float('nan')),
+        x=heatmap_matrix.columns.tolist(), y=DAYS_ORDER,
+        colorscale="Purples"
+    ))
+    fig_heat.update_layout(
+        template=PLOTLY_TEMPLATE,
+        plot_bgcolor=CHART_BG_COLOR, paper_bgcolor=CHART_BG_COLOR,
+        xaxis_title="", yaxis_title="", margin=dict(l=0, r=0, t=10, b=0)
+    )
+    return fig_heat
+
+@st.cache_data(show_spinner=False, ttl=600)
+def build_demographics_fig(demo_df: pd.DataFrame) -> go.Figure:
+    fig_bar = px.bar(
+        demo_df, x="total_sales", y="category", color="gender", 
+        orientation='h', template=PLOTLY_TEMPLATE,
+        color_discrete_sequence=['#c084fc', '#6366f1', '#38bdf8']
+    )
+    fig_bar.update_layout(
+        plot_bgcolor=CHART_BG_COLOR, paper_bgcolor=CHART_BG_COLOR,
+        xaxis_title="Revenue ($)", yaxis_title="", barmode="stack",
+        margin=dict(l=0, r=0, t=10, b=0),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig_bar
 
 # ---------------- MAIN APPLICATION ----------------
 def main():
+    # Streamlit drops any element a rerun doesn't re-emit, so the stylesheet is written on every run;
+    # it is a constant string, so this is a single cheap delta rather than a per-run rebuild
+    st.markdown(custom_css, unsafe_allow_html=True)
+
     # Header Section
     st.markdown("<h1 class='title-glow'>🌌 Retail Pulse Pro</h1>", unsafe_allow_html=True)
     st.markdown("<p style='text-align: center; color: #94a3b8; margin-bottom: 2rem;'>Real-time AI-Enhanced Operations Analytics</p>", unsafe_allow_html=True)
 
     # --- INITIAL DATA LOAD ---
     try:
-        date_bounds = run_query("SELECT MIN(sale_date) as min_date, MAX(sale_date) as max_date FROM retail_sales;").iloc[0]
-        gender_list = run_query("SELECT DISTINCT gender FROM retail_sales;")["gender"].tolist()
-        category_list = run_query("SELECT DISTINCT category FROM retail_sales;")["category"].tolist()
+        min_date, max_date, gender_list, category_list = load_filter_metadata()
     except Exception:
         st.warning("Could not load database. Please check your connection.")
         st.stop()
@@ -96,7 +337,7 @@ def main():
         st.markdown("### 🎛️ Mission Control")
         st.markdown("---")
         
-        date_range = st.date_input("📅 Date Range", [date_bounds['min_date'], date_bounds['max_date']])
+        date_range = st.date_input("📅 Date Range", [min_date, max_date])
         gender_filter = st.multiselect("👥 Demographics", gender_list, default=gender_list)
         category_filter = st.multiselect("📦 Product Categories", category_list, default=category_list)
         
@@ -104,144 +345,112 @@ def main():
         if st.button("↻ Reset Views", use_container_width=True):
             st.rerun()
 
-    # Validation
+    # Validation: stop before any dashboard query runs (only the cached filter metadata is needed above)
     if len(date_range) != 2 or not gender_filter or not category_filter:
         st.info("💡 Adjust the filters in the sidebar to populate the dashboard.")
         st.stop()
 
-    params = {
-        "start_date": date_range[0],
-        "end_date": date_range[1],
-        "gender": tuple(gender_filter),
-        "category": tuple(category_filter)
-    }
-    
-    base_where_clause = "WHERE sale_date BETWEEN :start_date AND :end_date AND gender IN :gender AND category IN :category"
+    # Hashable, order-independent filter key shared by every cached query and the ledger cursor
+    filters = (date_range[0], date_range[1], tuple(sorted(gender_filter)), tuple(sorted(category_filter)))
+
+    # Ledger cursor resets whenever the filters change
+    if st.session_state.get("ledger_filters") != filters:
+        st.session_state["ledger_filters"] = filters
+        st.session_state["ledger_cursor"] = None
+    cursor = st.session_state["ledger_cursor"]
+
+    # Dashboard rollups and the ledger page are independent, so fetch them side by side
+    try:
+        results = run_concurrently({
+            "aggregates": (load_aggregates, filters),
+            "ledger": (load_ledger_page, filters, cursor)
+        })
+    except SQLAlchemyError as e:
+        st.error(f"Database connection error: {e}")
+        st.stop()
+    aggregates, df_raw = results["aggregates"], results["ledger"]
 
     # --- KPI METRIC CARDS ---
-    kpi_query = f"""
-    SELECT SUM(total_sale) AS total_sales, 
-           COUNT(DISTINCT customer_id) AS total_customers, 
-           COUNT(transaction_id) AS total_orders 
-    FROM retail_sales {base_where_clause}
-    """
-    kpi_df = run_query(kpi_query, params)
-    
+    kpi_row = aggregates["kpi"]
+
     # Calculate Average Order Value (AOV)
-    sales_val = kpi_df['total_sales'].iloc[0] or 0
-    orders_val = kpi_df['total_orders'].iloc[0] or 1
-    aov_val = sales_val / orders_val
+    sales_val = kpi_row['total_sales'] if pd.notna(kpi_row['total_sales']) else 0
+    orders_val = int(kpi_row['total_orders'])
+    aov_val = sales_val / orders_val if orders_val else 0
 
     # 4 Columns for Metrics
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Gross Revenue", f"${sales_val:,.0f}")
     col2.metric("Total Transactions", f"{orders_val:,}")
-    col3.metric("Unique Customers", f"{kpi_df['total_customers'].iloc[0]:,}")
+    col3.metric("Unique Customers", f"{int(kpi_row['total_customers']):,}")
     col4.metric("Avg Order Value (AOV)", f"${aov_val:,.2f}")
+
+    # Only flag staleness when the live table has matching sales newer than the nightly rollup
+    rollup_through, latest_sale = kpi_row['rollup_through'], kpi_row['latest_sale']
+    if pd.notna(rollup_through) and pd.notna(latest_sale) and latest_sale > rollup_through:
+        st.caption(f"🕒 KPIs and charts cover sales through {rollup_through:%Y-%m-%d} (refreshed nightly); the ledger also shows transactions through {latest_sale:%Y-%m-%d}.")
         
     st.write("---") # Spacer line
 
     # --- ADVANCED CHARTS SECTION ---
-    # We will query a daily aggregated dataset once to build multiple charts (faster than multiple SQL queries)
-    daily_query = f"""
-    SELECT sale_date, category, gender, SUM(total_sale) AS daily_sales
-    FROM retail_sales {base_where_clause}
-    GROUP BY sale_date, category, gender
-    """
-    df_daily = run_query(daily_query, params)
-
-    if not df_daily.empty:
-        df_daily['sale_date'] = pd.to_datetime(df_daily['sale_date'])
-        df_daily['day_of_week'] = df_daily['sale_date'].dt.day_name()
-        
-        plotly_template = "plotly_dark"
-        chart_bg_color = 'rgba(0,0,0,0)' 
-        custom_indigo_colors = ['#3730a3', '#4f46e5', '#6366f1', '#818cf8', '#a5b4fc', '#c7d2fe']
-
+    if not aggregates["trend"].empty:
         # ROW 1: Trend Line & Donut
         row1_col1, row1_col2 = st.columns([2, 1])
 
         with row1_col1:
             st.markdown("### 📈 Revenue Trajectory")
-            trend_df = df_daily.groupby('sale_date')['daily_sales'].sum().reset_index()
-            fig_area = px.area(
-                trend_df, x="sale_date", y="daily_sales", 
-                template=plotly_template, color_discrete_sequence=["#818cf8"]
-            )
-            fig_area.update_layout(
-                plot_bgcolor=chart_bg_color, paper_bgcolor=chart_bg_color,
-                xaxis=dict(showgrid=False, title=""), 
-                yaxis=dict(showgrid=True, gridcolor='#334155', title="Revenue ($)"),
-                margin=dict(l=0, r=0, t=10, b=0)
-            )
-            st.plotly_chart(fig_area, use_container_width=True)
+            st.plotly_chart(build_trend_fig(aggregates["trend"]), use_container_width=True)
 
         with row1_col2:
             st.markdown("### 📦 Category Share")
-            cat_df = df_daily.groupby('category')['daily_sales'].sum().reset_index()
-            fig_donut = px.pie(
-                cat_df, values="daily_sales", names="category", hole=0.7,
-                template=plotly_template, color_discrete_sequence=custom_indigo_colors
-            )
-            fig_donut.update_traces(textposition='inside', textinfo='percent')
-            fig_donut.update_layout(
-                plot_bgcolor=chart_bg_color, paper_bgcolor=chart_bg_color,
-                margin=dict(l=0, r=0, t=10, b=0), showlegend=True,
-                legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5)
-            )
-            st.plotly_chart(fig_donut, use_container_width=True)
+            st.plotly_chart(build_category_fig(aggregates["category"]), use_container_width=True)
 
         # ROW 2: Heatmap & Stacked Bar
         row2_col1, row2_col2 = st.columns([1, 1])
 
         with row2_col1:
             st.markdown("### 🔥 Sales Intensity (Day vs. Category)")
-            heatmap_df = df_daily.groupby(['day_of_week', 'category'])['daily_sales'].sum().reset_index()
-            # Order days logically
-            days_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            fig_heat = px.density_heatmap(
-                heatmap_df, x="category", y="day_of_week", z="daily_sales",
-                category_orders={"day_of_week": days_order},
-                color_continuous_scale="Purples", template=plotly_template
-            )
-            fig_heat.update_layout(
-                plot_bgcolor=chart_bg_color, paper_bgcolor=chart_bg_color,
-                xaxis_title="", yaxis_title="", margin=dict(l=0, r=0, t=10, b=0)
-            )
-            st.plotly_chart(fig_heat, use_container_width=True)
+            st.plotly_chart(build_heatmap_fig(aggregates["heatmap"]), use_container_width=True)
 
         with row2_col2:
             st.markdown("### 👥 Demographic Preferences")
-            demo_df = df_daily.groupby(['category', 'gender'])['daily_sales'].sum().reset_index()
-            fig_bar = px.bar(
-                demo_df, x="daily_sales", y="category", color="gender", 
-                orientation='h', template=plotly_template,
-                color_discrete_sequence=['#c084fc', '#6366f1', '#38bdf8']
-            )
-            fig_bar.update_layout(
-                plot_bgcolor=chart_bg_color, paper_bgcolor=chart_bg_color,
-                xaxis_title="Revenue ($)", yaxis_title="", barmode="stack",
-                margin=dict(l=0, r=0, t=10, b=0),
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-            )
-            st.plotly_chart(fig_bar, use_container_width=True)
+            st.plotly_chart(build_demographics_fig(aggregates["demographics"]), use_container_width=True)
 
     else:
         st.info("No data available for these visualizations.")
 
     st.write("---")
 
-    # --- RAW DATA TABLE WITH CONDITIONAL FORMATTING ---
+    # --- RAW DATA TABLE WITH DATA BARS ---
     with st.expander("📄 View Transaction Ledger"):
-        raw_query = f"SELECT sale_date, customer_id, gender, category, total_sale FROM retail_sales {base_where_clause} ORDER BY sale_date DESC LIMIT 500"
-        df_raw = run_query(raw_query, params)
+        nav_col1, nav_col2 = st.columns(2)
+        if nav_col1.button("⏮ Newest", disabled=cursor is None, use_container_width=True):
+            st.session_state["ledger_cursor"] = None
+            st.rerun()
+        # A short first page only means the recent window ran out, so older rows may still exist
+        no_older_rows = df_raw.empty or (cursor is not None and len(df_raw) < LEDGER_PAGE_SIZE)
+        if nav_col2.button("Older ⏭", disabled=no_older_rows, use_container_width=True):
+            last_row = df_raw.iloc[-1]
+            # run_query casts sale_date to date32 (see DATE_COLUMNS); fromisoformat-on-str keeps the cursor a real date
+            # even if a driver hands the column back as text
+            cursor_date = last_row['sale_date']
+            if isinstance(cursor_date, str):
+                cursor_date = date.fromisoformat(cursor_date)
+            st.session_state["ledger_cursor"] = (cursor_date, int(last_row['transaction_id']))
+            st.rerun()
         
         if not df_raw.empty:
-            # Add a gradient background to the total_sale column to act as a data bar
+            # Render total_sale as a client-side data bar instead of a Styler-generated HTML table
             st.dataframe(
-                df_raw.style.background_gradient(subset=['total_sale'], cmap='Purples'),
+                df_raw.drop(columns=['transaction_id']),
                 use_container_width=True,
-                hide_index=True
+                hide_index=True,
+                column_config={
+                    "total_sale": st.column_config.ProgressColumn(
+                        "Total Sale", format="$%.2f",
+                        min_value=0, max_value=float(df_raw['total_sale'].max())
+                    )
+                }
             )
         else:
             st.warning("No transactions found.")
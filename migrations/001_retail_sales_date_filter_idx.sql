@@ -0,0 +1,21 @@
+-- Covering index for the transaction ledger.
+-- Lets Postgres answer "ORDER BY sale_date DESC, transaction_id DESC LIMIT n" (and the keyset
+-- continuation "(sale_date, transaction_id) < (:cursor_date, :cursor_id)") with an Index Only Scan
+-- instead of sorting every row that matches the sidebar filters.
+--
+-- Run with psql outside a transaction block (CONCURRENTLY and VACUUM both require autocommit):
+--   psql -d Retail_Sales -f migrations/001_retail_sales_date_filter_idx.sql
+--
+-- Verify with:
+--   EXPLAIN (ANALYZE, BUFFERS)
+--   SELECT sale_date, transaction_id, customer_id, gender, category, total_sale
+--   FROM retail_sales
+--   WHERE sale_date BETWEEN '2022-01-01' AND '2023-12-31'
+--   ORDER BY sale_date DESC, transaction_id DESC LIMIT 500;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS retail_sales_date_filter_idx
+    ON retail_sales (sale_date DESC, transaction_id DESC)
+    INCLUDE (gender, category, customer_id, total_sale);
+
+-- Keep the visibility map fresh so the planner can skip heap fetches.
+VACUUM (ANALYZE) retail_sales;
@@ -0,0 +1,15 @@
+-- HyperLogLog extension for the "Unique Customers" KPI.
+-- For date ranges of 30 days or more the dashboard replaces COUNT(DISTINCT customer_id) with
+-- hll_cardinality(hll_add_agg(hll_hash_integer(customer_id))), which avoids sorting or hashing
+-- every distinct customer in the filtered set at the cost of ~1% error.
+--
+-- Requires the postgresql-hll package on the database server
+-- (https://github.com/citusdata/postgresql-hll), then:
+--   psql -d Retail_Sales -f migrations/002_hll_extension.sql
+--
+-- Verify with:
+--   SELECT COUNT(DISTINCT customer_id) AS exact,
+--          hll_cardinality(hll_add_agg(hll_hash_integer(customer_id))) AS approx
+--   FROM retail_sales;
+
+CREATE EXTENSION IF NOT EXISTS hll;
@@ -0,0 +1,26 @@
+-- Daily rollup of retail_sales keyed on (sale_date, category, gender).
+-- The dashboard's chart and revenue/order KPI query reads this view instead of the raw table;
+-- only the "Unique Customers" KPI still scans retail_sales, since distinct counts don't sum across days.
+--
+-- Run with psql outside a transaction block:
+--   psql -d Retail_Sales -f migrations/003_retail_sales_daily_mv.sql
+--
+-- The nightly refresh is scheduled separately by 004_schedule_retail_sales_daily_refresh.sql.
+-- To refresh by hand:
+--   REFRESH MATERIALIZED VIEW CONCURRENTLY retail_sales_daily;
+
+\set ON_ERROR_STOP on
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS retail_sales_daily AS
+SELECT sale_date, category, gender,
+       SUM(total_sale) AS daily_sales,
+       COUNT(*) AS n_orders,
+       COUNT(DISTINCT customer_id) AS n_customers
+FROM retail_sales
+GROUP BY 1, 2, 3;
+
+-- REFRESH ... CONCURRENTLY needs a unique index; it also serves the dashboard's range filter.
+CREATE UNIQUE INDEX IF NOT EXISTS retail_sales_daily_key_idx
+    ON retail_sales_daily (sale_date, category, gender);
+
+ANALYZE retail_sales_daily;
@@ -0,0 +1,21 @@
+-- Nightly refresh of the retail_sales_daily materialized view (created by 003).
+-- pg_cron only installs into the database named by cron.database_name (default 'postgres'),
+-- so this script runs there and schedules the job into the dashboard database.
+-- Requires pg_cron in shared_preload_libraries and pg_cron >= 1.4 for cron.schedule_in_database.
+--
+-- Run against the cron database, passing the dashboard database name:
+--   psql -d postgres -v target_db=Retail_Sales -f migrations/004_schedule_retail_sales_daily_refresh.sql
+--
+-- Verify with:
+--   SELECT jobname, schedule, database, active FROM cron.job;
+
+\set ON_ERROR_STOP on
+
+CREATE EXTENSION IF NOT EXISTS pg_cron;
+
+SELECT cron.schedule_in_database(
+    'refresh-retail-sales-daily',
+    '15 2 * * *',
+    'REFRESH MATERIALIZED VIEW CONCURRENTLY retail_sales_daily',
+    :'target_db'
+);